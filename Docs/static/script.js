@@ -160,9 +160,10 @@ class CryptoTradingBot {
 
     updateDashboard(data) {
         if (data.instruments) {
-            this.instruments = data.instruments;
-            this.updateCryptoCards(data.instruments);
-            this.updateStats(data);
+            // Periodic updates only carry the instruments that changed
+            Object.assign(this.instruments, data.instruments);
+            this.updateCryptoCards(this.instruments);
+            this.updateStats({ ...data, instruments: this.instruments });
         }
     }
 
@@ -0,0 +1,23 @@
+"""Fastest available JSON codec: orjson, then ujson, then the stdlib json module"""
+try:
+    import orjson as _backend
+except ImportError:
+    try:
+        import ujson as _backend
+    except ImportError:
+        import json as _backend
+
+# All three accept bytes directly, so stream lines can skip the utf-8 decode
+loads = _backend.loads
+
+# Every backend raises a ValueError subclass on malformed input
+JSONDecodeError = ValueError
+
+if _backend.__name__ == 'orjson':
+    def dumps(obj) -> bytes:
+        """Serialize to UTF-8 JSON bytes; NumPy arrays and scalars are encoded natively"""
+        return _backend.dumps(obj, option=_backend.OPT_SERIALIZE_NUMPY)
+else:
+    def dumps(obj) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        return _backend.dumps(obj).encode('utf-8')
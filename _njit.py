@@ -0,0 +1,12 @@
+"""Optional numba import shared by the hot numeric helpers"""
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional; decorated functions simply run as plain Python
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit, usable bare or with options"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
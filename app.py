@@ -1,11 +1,11 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, Response, render_template, jsonify
 from flask_socketio import SocketIO, emit
 import threading
 import json
-import time
 from datetime import datetime, timezone
 import os
 from trading_bot import LiveOandaTrader
+import _fastjson
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'forex-trading-bot-secret-key'
@@ -24,13 +24,16 @@ def dashboard():
 def get_status():
     """API endpoint to get current bot status"""
     if trader:
-        return jsonify(trader.get_dashboard_state())
-    return jsonify({
-        'connection_status': 'Not Started',
-        'uptime': '0s',
-        'instruments': {},
-        'logs': []
-    })
+        state = trader.get_dashboard_state()
+    else:
+        state = {
+            'connection_status': 'Not Started',
+            'uptime': '0s',
+            'instruments': {},
+            'logs': []
+        }
+    # Encoded with orjson when available instead of jsonify's stdlib encoder
+    return Response(_fastjson.dumps(state), mimetype='application/json')
 
 @app.route('/api/test-smc', methods=['POST'])
 def test_smc():
@@ -39,7 +42,8 @@ def test_smc():
     from smc_analysis import SMCBot
     
     try:
-        data = request.get_json()
+        raw = request.get_data()
+        data = _fastjson.loads(raw) if raw else None
         if not data or 'h4_data' not in data or 'h1_data' not in data:
             return jsonify({'error': 'Missing h4_data or h1_data'}), 400
         
@@ -50,16 +54,22 @@ def test_smc():
         result = bot.analyze(data['h4_data'], data['h1_data'])
         
         # Add swing point analysis for debugging
-        h4_swings = bot._get_swing_points(data['h4_data'])
-        h1_swings = bot._get_swing_points(data['h1_data'])
+        h4_highs, h4_lows = bot._get_swing_points(data['h4_data'])
+        h1_highs, h1_lows = bot._get_swing_points(data['h1_data'])
         
         debug_info = {
-            'h4_swing_highs': len(h4_swings['highs']),
-            'h4_swing_lows': len(h4_swings['lows']),
-            'h1_swing_highs': len(h1_swings['highs']),
-            'h1_swing_lows': len(h1_swings['lows']),
-            'h4_swings': h4_swings,
-            'h1_swings': h1_swings
+            'h4_swing_highs': len(h4_highs),
+            'h4_swing_lows': len(h4_lows),
+            'h1_swing_highs': len(h1_highs),
+            'h1_swing_lows': len(h1_lows),
+            'h4_swings': {
+                'highs': [data['h4_data'][i] for i in h4_highs],
+                'lows': [data['h4_data'][i] for i in h4_lows]
+            },
+            'h1_swings': {
+                'highs': [data['h1_data'][i] for i in h1_highs],
+                'lows': [data['h1_data'][i] for i in h1_lows]
+            }
         }
         
         return jsonify({
@@ -107,15 +117,20 @@ def handle_stop_bot():
 
 def background_status_updates():
     """Send periodic status updates to connected clients"""
+    last_connection_status = None
     while True:
         if trader:
-            socketio.emit('status_update', trader.get_dashboard_state())
-        time.sleep(1)  # Update every second
+            # Only instruments that changed; clients merge it into the full state sent on connect
+            diff = trader.get_dashboard_diff()
+            if diff['instruments'] or diff['connection_status'] != last_connection_status:
+                last_connection_status = diff['connection_status']
+                socketio.emit('status_update', diff)
+        # Yield to the server's event loop rather than blocking a native thread
+        socketio.sleep(0.25)
 
 if __name__ == '__main__':
     # Start background status updates
-    status_thread = threading.Thread(target=background_status_updates, daemon=True)
-    status_thread.start()
+    socketio.start_background_task(background_status_updates)
     
     # Get port from environment for Replit compatibility
     port = int(os.environ.get('PORT', 5000))
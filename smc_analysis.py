@@ -1,20 +1,261 @@
-from typing import List, Dict, Optional
+import bisect
+from collections import deque, namedtuple
+from typing import List, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from _njit import njit, HAVE_NUMBA  # without numba the NumPy forms of the kernels below are used instead
+
+# Struct-of-arrays candle layout: parallel time/open/high/low/close columns
+Candles = namedtuple('Candles', 't o h l c')
+
+# Direction codes understood by _ob_kernel
+OB_DIRECTIONS = {"bullish": 1, "bearish": -1}
+
+# Retracement ratios checked by _is_fibonacci_level
+FIB_LEVELS = np.array([0.236, 0.382, 0.5, 0.618, 0.786])
+
+# Risk score buckets: a value >= THRESHOLDS[i-1] and < THRESHOLDS[i] lands in bucket i
+RR_THRESHOLDS = (1.5, 2.0, 3.0)
+RR_SCORES = (0, 10, 20, 30)
+RR_LABELS = (
+    "Poor R:R ratio (<1:1.5)",
+    "Acceptable R:R ratio (1:1.5+)",
+    "Good R:R ratio (1:2+)",
+    "Excellent R:R ratio (1:3+)",
+)
+POI_THRESHOLDS = (0.4, 0.6, 0.8)
+POI_SCORES = (0, 8, 15, 25)
+POI_LABELS = (
+    "Very weak POI formation",
+    "Weak POI formation",
+    "Good POI formation",
+    "Strong POI formation",
+)
+STRUCTURE_THRESHOLDS = (0.6, 0.8)
+STRUCTURE_SCORES = (5, 12, 20)
+STRUCTURE_LABELS = ("Weak market structure", "Good market structure", "Strong market structure")
+MOMENTUM_THRESHOLDS = (0.5, 0.7)
+MOMENTUM_SCORES = (3, 10, 15)
+MOMENTUM_LABELS = ("Weak momentum", "Moderate momentum", "Strong momentum")
+
+def _swing_loop(h, l):
+    """Indices of swing highs and swing lows, as a single loop for numba"""
+    n = len(h)
+    highs = np.empty(max(n - 2, 0), dtype=np.int64)
+    lows = np.empty(max(n - 2, 0), dtype=np.int64)
+    n_highs = 0
+    n_lows = 0
+    for i in range(1, n - 1):
+        # Swing high: higher than both neighbors
+        if h[i] >= h[i - 1] and h[i] > h[i + 1]:
+            highs[n_highs] = i
+            n_highs += 1
+        # Swing low: lower than both neighbors
+        if l[i] <= l[i - 1] and l[i] < l[i + 1]:
+            lows[n_lows] = i
+            n_lows += 1
+    return highs[:n_highs], lows[:n_lows]
+
+def _swing_numpy(h, l):
+    """Indices of swing highs and swing lows, as NumPy masks"""
+    if len(h) < 3:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    # Swing high: higher than both neighbors
+    mid_h = h[1:-1]
+    is_high = np.greater_equal(mid_h, h[:-2]) & np.greater(mid_h, h[2:])
+    # Swing low: lower than both neighbors
+    mid_l = l[1:-1]
+    is_low = np.less_equal(mid_l, l[:-2]) & np.less(mid_l, l[2:])
+    return np.flatnonzero(is_high) + 1, np.flatnonzero(is_low) + 1
+
+def _ob_loop(o, c, body, direction_code):
+    """Indices of candles followed by a stronger opposite-color candle, as a single loop for numba"""
+    n = len(o)
+    out = np.empty(max(n - 1, 0), dtype=np.int64)
+    if n < 2:
+        return out
+    k = 0
+    # Candle direction: +1 bullish, -1 bearish, 0 doji
+    prev_dir = int(c[0] > o[0]) - int(c[0] < o[0])
+    for i in range(1, n):
+        cur_dir = int(c[i] > o[i]) - int(c[i] < o[i])
+        # Reversal into the requested direction on a stronger body; written
+        # unconditionally and kept only by advancing k, so the loop never branches
+        hit = (prev_dir == -direction_code) & (cur_dir == direction_code) & (body[i] > body[i - 1])
+        out[k] = i - 1
+        k += int(hit)
+        prev_dir = cur_dir
+    return out[:k]
+
+def _ob_numpy(o, c, body, direction_code):
+    """Indices of candles followed by a stronger opposite-color candle, as NumPy masks"""
+    if len(o) < 2:
+        return np.empty(0, dtype=np.int64)
+    # Candle direction: +1 bullish, -1 bearish, 0 doji
+    candle_dir = np.sign(c - o)
+    # Reversal into the requested direction on a stronger body, as one mask chain
+    hits = (candle_dir[:-1] == -direction_code) & (candle_dir[1:] == direction_code) & (body[1:] > body[:-1])
+    return np.flatnonzero(hits)
+
+if HAVE_NUMBA:
+    # Explicit signatures compile eagerly at import and let later runs load the on-disk
+    # cache instead of paying type inference and JIT latency on the first analysis
+    _swing_kernel = njit('Tuple((i8[:], i8[:]))(f8[:], f8[:])', cache=True, boundscheck=False)(_swing_loop)
+    _ob_kernel = njit('i8[:](f8[:], f8[:], f8[:], i8)', cache=True, boundscheck=False)(_ob_loop)
+else:
+    _swing_kernel = _swing_numpy
+    _ob_kernel = _ob_numpy
+
+def swing_flags(h, l, i):
+    """(is_swing_high, is_swing_low) for candle i; the single-candle form of _swing_kernel"""
+    return (bool(h[i] >= h[i - 1] and h[i] > h[i + 1]),
+            bool(l[i] <= l[i - 1] and l[i] < l[i + 1]))
+
+class MonotonicDeque:
+    """Sliding-window max or min over the last `size` pushed values, O(1) amortized per push"""
+
+    def __init__(self, size: int, mode: str = 'max'):
+        self.size = size
+        self.mode = mode
+        self._items = deque()  # (sequence number, value), values monotonic from the front
+        self._seq = 0
+
+    def push(self, value: float):
+        """Add a value and expire anything that slid out of the window"""
+        items = self._items
+        if self.mode == 'max':
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((self._seq, value))
+        self._seq += 1
+        while items[0][0] <= self._seq - 1 - self.size:
+            items.popleft()
+
+    def clear(self):
+        self._items.clear()
+        self._seq = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._items[0][1] if self._items else None
+
 
 class SMCBot:
     """Smart Money Concepts Analysis Engine"""
     
     def __init__(self, instrument_name: str):
         self.instrument = instrument_name
-        self.mitigated_h4_pois = set()
-        self.mitigated_h1_pois = set()
+        # Times of mitigated POIs, kept as sorted int64 arrays
+        self.mitigated_h4_pois = np.empty(0, dtype=np.int64)
+        self.mitigated_h1_pois = np.empty(0, dtype=np.int64)
+        # Swing points per candle snapshot, only kept for the duration of analyze()
+        self._swing_cache = {}
+        # Sorted historical H1 highs+lows, built lazily once per analyze()
+        self._sr_sorted = None
+        # Candle body/range columns, computed once per analyze()
+        self._h4_body = None
+        self._h1_body = None
+        self._h1_range = None
+        self._h1_body_ratio = None
+        # Rolling 10-candle H1 high/low, fed only the candles added since the last call
+        self._rolling = {'h1_hi10': MonotonicDeque(10, mode='max'), 'h1_lo10': MonotonicDeque(10, mode='min')}
+        self._rolling_last_time = None
+        # Signature and verdict of the previous analyze() call
+        self._last_sig = None
+        self._last_result = None
 
-    def analyze(self, h4_data: List[Dict], h1_data: List[Dict]) -> Dict:
+    def analyze(self, h4_data: Union[List[Dict], Candles], h1_data: Union[List[Dict], Candles]) -> Dict:
         """Main analysis method that combines 4H bias and 1H entry logic"""
-        if len(h4_data) < 5 or len(h1_data) < 5:
+        return self._analyze(h4_data, h1_data)
+
+    def analyze_incremental(self, h4: Candles, h1: Candles,
+                            h4_swings: Tuple[np.ndarray, np.ndarray],
+                            h1_swings: Tuple[np.ndarray, np.ndarray]) -> Dict:
+        """Same as analyze(), reusing (high_idx, low_idx) swings the caller maintains as candles close"""
+        return self._analyze(h4, h1, (h4_swings, h1_swings))
+
+    def _analyze(self, h4_data: Union[List[Dict], Candles], h1_data: Union[List[Dict], Candles],
+                 swings: Optional[tuple] = None) -> Dict:
+        """Memoized entry point shared by analyze() and analyze_incremental()"""
+        # Candle history is append-only, so unchanged lengths and last times plus an
+        # unchanged mitigation state mean the previous verdict still holds
+        sig = (self._snapshot_key(h4_data), self._snapshot_key(h1_data),
+               self.mitigated_h4_pois.tobytes(), self.mitigated_h1_pois.tobytes())
+        if sig != self._last_sig:
+            self._last_result = self._evaluate(h4_data, h1_data, swings)
+            self._last_sig = sig
+        # Callers annotate the returned dict, so hand out a copy
+        return dict(self._last_result)
+
+    def _snapshot_key(self, data: Union[List[Dict], Candles]) -> tuple:
+        """Cheap (length, last time) fingerprint of a candle series"""
+        if isinstance(data, Candles):
+            n = len(data.t)
+            return n, int(data.t[-1]) if n else None
+        n = len(data)
+        return n, data[-1].get('time') if n else None
+
+    def _evaluate(self, h4_data: Union[List[Dict], Candles], h1_data: Union[List[Dict], Candles],
+                  swings: Optional[tuple] = None) -> Dict:
+        """Convert the candles and run the full analysis"""
+        # Convert to column arrays once; everything below works on the SoA view
+        h4 = self._to_soa(h4_data)
+        h1 = self._to_soa(h1_data)
+        if len(h4.t) < 5 or len(h1.t) < 5:
             return self._format_no_trade("INVALID_STRUCTURE", "Waiting for more candle data.")
 
+        self._update_rolling(h1)
+        self._reset_snapshot_state()
+        try:
+            if swings is not None:
+                # Precomputed swings stand in for the full _swing_kernel scans
+                for data, data_swings in zip((h4, h1), swings):
+                    self._swing_cache[self._swing_key(data)] = (data, data_swings)
+            # Shared by the order-block scans, POI quality and momentum checks
+            self._h4_body = np.abs(h4.c - h4.o)
+            self._h1_body = np.abs(h1.c - h1.o)
+            self._h1_range = h1.h - h1.l
+            self._h1_body_ratio = np.divide(self._h1_body, self._h1_range,
+                                            out=np.zeros_like(self._h1_body), where=self._h1_range > 0)
+            return self._run_analysis(h4, h1)
+        finally:
+            self._reset_snapshot_state()
+
+    def _update_rolling(self, h1: Candles):
+        """Push the H1 candles closed since the previous call into the rolling windows"""
+        window = self._rolling['h1_hi10'].size
+        n = len(h1.t)
+        last = self._rolling_last_time
+        start = 0 if last is None else int(np.searchsorted(h1.t, last, side='right'))
+        # Anything but a short append (first call, trimmed or replaced history,
+        # or a gap wider than the window) rebuilds the windows from the tail
+        if last is None or start == 0 or h1.t[start - 1] != last or n - start > window:
+            for rolling in self._rolling.values():
+                rolling.clear()
+            start = max(0, n - window)
+        for i in range(start, n):
+            self._rolling['h1_hi10'].push(float(h1.h[i]))
+            self._rolling['h1_lo10'].push(float(h1.l[i]))
+        self._rolling_last_time = int(h1.t[-1]) if n else None
+
+    def _reset_snapshot_state(self):
+        """Drop everything derived from the candles of a single analyze() call"""
+        self._swing_cache.clear()
+        self._sr_sorted = None
+        self._h4_body = None
+        self._h1_body = None
+        self._h1_range = None
+        self._h1_body_ratio = None
+
+    def _run_analysis(self, h4: Candles, h1: Candles) -> Dict:
+        """Run the 4H bias -> 1H entry pipeline on converted candles"""
         # Get 4H bias
-        bias_analysis = self._get_4h_bias(h4_data)
+        bias_analysis = self._get_4h_bias(h4)
         if "error" in bias_analysis:
             return self._format_no_trade(bias_analysis["reason"], bias_analysis["error"])
 
@@ -22,217 +263,229 @@ class SMCBot:
         h4_poi = bias_analysis["poi"]
         
         # Check if 4H POI is mitigated
-        if not self._is_mitigated(h4_poi, h4_data):
+        if not self._is_mitigated(h4_poi, h4):
             return self._format_no_trade("WAITING_FOR_4H_POI_MITIGATION", f"Waiting for price to tap 4H POI for {bias}")
         
         # Mark 4H POI as mitigated
-        if 'time' in h4_poi and h4_poi['time'] not in self.mitigated_h4_pois:
-            self.mitigated_h4_pois.add(h4_poi['time'])
+        self.mitigated_h4_pois = self._mitigated_add(self.mitigated_h4_pois, int(h4.t[h4_poi]))
         
         # Get 1H entry
-        entry_analysis = self._get_1h_entry(bias, h1_data)
+        entry_analysis = self._get_1h_entry(bias, h1)
         if "error" in entry_analysis:
             return self._format_no_trade(entry_analysis["reason"], entry_analysis["error"])
         
         h1_poi = entry_analysis["poi"]
+        h1_swings = entry_analysis["swings"]
 
         # Check if 1H POI is mitigated
-        if not self._is_mitigated(h1_poi, h1_data):
+        if not self._is_mitigated(h1_poi, h1):
             return self._format_no_trade("WAITING_FOR_1H_POI_MITIGATION", "Waiting for price to tap 1H POI")
         
         # Mark 1H POI as mitigated
-        if 'time' in h1_poi and h1_poi['time'] not in self.mitigated_h1_pois:
-            self.mitigated_h1_pois.add(h1_poi['time'])
+        self.mitigated_h1_pois = self._mitigated_add(self.mitigated_h1_pois, int(h1.t[h1_poi]))
 
         # Prepare trade
-        return self._prepare_trade(bias, h1_poi, h1_data)
+        return self._prepare_trade(bias, h1_poi, h1, h1_swings)
+
+    def _to_soa(self, data: Union[List[Dict], Candles]) -> Candles:
+        """Convert a list of candle dicts into parallel NumPy columns"""
+        if isinstance(data, Candles):
+            return data
+
+        n = len(data)
+        return Candles(
+            t=np.fromiter((c.get('time', 0) for c in data), dtype=np.int64, count=n),
+            o=np.fromiter((c['open'] for c in data), dtype=np.float64, count=n),
+            h=np.fromiter((c['high'] for c in data), dtype=np.float64, count=n),
+            l=np.fromiter((c['low'] for c in data), dtype=np.float64, count=n),
+            c=np.fromiter((c['close'] for c in data), dtype=np.float64, count=n),
+        )
 
-    def _get_4h_bias(self, h4_data: List[Dict]) -> Dict:
+    def _get_4h_bias(self, h4: Candles) -> Dict:
         """Determine 4H bias based on liquidity sweep and market structure shift"""
-        swings = self._get_swing_points(h4_data)
-        if not swings['highs'] or not swings['lows']:
+        swing_highs, swing_lows = self._get_swing_points(h4)
+        if not len(swing_highs) or not len(swing_lows):
             return {"error": "Insufficient swing points", "reason": "INVALID_STRUCTURE"}
         
-        last_candle = h4_data[-1]
+        # The latest candle can only sweep one side in most bars; settle that first
+        swept_low = self._find_liquidity_sweep(h4, swing_lows, "low")
+        swept_high = self._find_liquidity_sweep(h4, swing_highs, "high")
+        if swept_low is None and swept_high is None:
+            return {"error": "Waiting for 4H liquidity sweep & MSS.", "reason": "NO_SETUP"}
+        
+        last_close = h4.c[-1]
         
         # Check for bullish bias (sweep low -> MSS high -> price above MSS)
-        swept_low = self._find_liquidity_sweep(swings['lows'], last_candle, "low")
-        if swept_low:
-            mss_high = self._find_mss(swept_low, swings['highs'], "bullish")
-            if mss_high and last_candle['close'] > mss_high['high']:
-                poi = self._find_poi_after_mss(mss_high, h4_data, "bullish")
-                if poi:
+        if swept_low is not None:
+            mss_high = self._find_mss(swept_low, h4, swing_highs, "bullish")
+            if mss_high is not None and last_close > h4.h[mss_high]:
+                poi = self._find_poi_after_mss(mss_high, h4, "bullish")
+                if poi is not None:
                     return {"bias": "BUY", "poi": poi}
         
         # Check for bearish bias (sweep high -> MSS low -> price below MSS)
-        swept_high = self._find_liquidity_sweep(swings['highs'], last_candle, "high")
-        if swept_high:
-            mss_low = self._find_mss(swept_high, swings['lows'], "bearish")
-            if mss_low and last_candle['close'] < mss_low['low']:
-                poi = self._find_poi_after_mss(mss_low, h4_data, "bearish")
-                if poi:
+        if swept_high is not None:
+            mss_low = self._find_mss(swept_high, h4, swing_lows, "bearish")
+            if mss_low is not None and last_close < h4.l[mss_low]:
+                poi = self._find_poi_after_mss(mss_low, h4, "bearish")
+                if poi is not None:
                     return {"bias": "SELL", "poi": poi}
 
         return {"error": "Waiting for 4H liquidity sweep & MSS.", "reason": "NO_SETUP"}
 
-    def _get_1h_entry(self, bias: str, h1_data: List[Dict]) -> Dict:
+    def _get_1h_entry(self, bias: str, h1: Candles) -> Dict:
         """Find 1H entry based on bias direction"""
-        swings = self._get_swing_points(h1_data)
-        if not swings['highs'] or not swings['lows']:
+        swing_highs, swing_lows = self._get_swing_points(h1)
+        if not len(swing_highs) or not len(swing_lows):
             return {"error": "Insufficient swing points", "reason": "INVALID_STRUCTURE"}
         
-        last_candle = h1_data[-1]
+        # Only the side matching the bias can produce an entry
+        if bias == "BUY":
+            swept = self._find_liquidity_sweep(h1, swing_lows, "low", is_mini=True)
+        elif bias == "SELL":
+            swept = self._find_liquidity_sweep(h1, swing_highs, "high", is_mini=True)
+        else:
+            swept = None
+        if swept is None:
+            return {"error": "Waiting for 1H liquidity sweep & MSS.", "reason": "NO_SETUP"}
+        
+        last_close = h1.c[-1]
 
         if bias == "BUY":
-            swept_low = self._find_liquidity_sweep(swings['lows'], last_candle, "low", is_mini=True)
-            if swept_low:
-                mss_high = self._find_mss(swept_low, swings['highs'], "bullish")
-                if mss_high and last_candle['close'] > mss_high['high']:
-                    poi = self._find_poi_after_mss(mss_high, h1_data, "bullish", is_1h=True)
-                    if poi:
-                        return {"poi": poi}
+            mss_high = self._find_mss(swept, h1, swing_highs, "bullish")
+            if mss_high is not None and last_close > h1.h[mss_high]:
+                poi = self._find_poi_after_mss(mss_high, h1, "bullish", is_1h=True)
+                if poi is not None:
+                    return {"poi": poi, "swings": (swing_highs, swing_lows)}
 
-        elif bias == "SELL":
-            swept_high = self._find_liquidity_sweep(swings['highs'], last_candle, "high", is_mini=True)
-            if swept_high:
-                mss_low = self._find_mss(swept_high, swings['lows'], "bearish")
-                if mss_low and last_candle['close'] < mss_low['low']:
-                    poi = self._find_poi_after_mss(mss_low, h1_data, "bearish", is_1h=True)
-                    if poi:
-                        return {"poi": poi}
+        else:
+            mss_low = self._find_mss(swept, h1, swing_lows, "bearish")
+            if mss_low is not None and last_close < h1.l[mss_low]:
+                poi = self._find_poi_after_mss(mss_low, h1, "bearish", is_1h=True)
+                if poi is not None:
+                    return {"poi": poi, "swings": (swing_highs, swing_lows)}
 
         return {"error": "Waiting for 1H liquidity sweep & MSS.", "reason": "NO_SETUP"}
     
-    def _get_swing_points(self, data: List[Dict]) -> Dict:
-        """Identify swing highs and lows"""
-        highs, lows = [], []
-        if len(data) < 3:
-            return {"highs": highs, "lows": lows}
-        
-        for i in range(1, len(data) - 1):
-            # Swing high: higher than both neighbors
-            if data[i]['high'] >= data[i-1]['high'] and data[i]['high'] > data[i+1]['high']:
-                highs.append(data[i])
-            # Swing low: lower than both neighbors
-            if data[i]['low'] <= data[i-1]['low'] and data[i]['low'] < data[i+1]['low']:
-                lows.append(data[i])
-        
-        return {"highs": highs, "lows": lows}
-
-    def _find_liquidity_sweep(self, swings: List[Dict], current_candle: Dict, side: str, is_mini: bool = False) -> Optional[Dict]:
-        """Find liquidity sweep events"""
-        if not swings:
+    def _get_swing_points(self, data: Union[List[Dict], Candles]) -> Tuple[np.ndarray, np.ndarray]:
+        """Identify swing highs and lows as (high_idx, low_idx) int64 index arrays"""
+        data = self._to_soa(data)
+        highs, lows = data.h, data.l
+
+        # The same snapshot is scanned more than once per analyze() call
+        key = self._swing_key(data)
+        cached = self._swing_cache.get(key)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+
+        swings = _swing_kernel(highs, lows)
+        self._swing_cache[key] = (data, swings)
+        return swings
+
+    def _swing_key(self, data: Candles) -> tuple:
+        """Cache key of a candle snapshot in _swing_cache"""
+        n = len(data.t)
+        return id(data), n, int(data.t[-1]) if n else 0
+
+    def _find_liquidity_sweep(self, data: Candles, swings: np.ndarray, side: str, is_mini: bool = False) -> Optional[int]:
+        """Find liquidity sweep events against the latest candle"""
+        if not len(swings):
             return None
         
-        last_swing = swings[-1]
+        last_swing = int(swings[-1])
         
-        if side == "low" and current_candle['low'] < last_swing['low']:
+        if side == "low" and data.l[-1] < data.l[last_swing]:
             return last_swing
-        if side == "high" and current_candle['high'] > last_swing['high']:
+        if side == "high" and data.h[-1] > data.h[last_swing]:
             return last_swing
         
         return None
 
-    def _find_mss(self, swept_point: Dict, opposite_swings: List[Dict], direction: str) -> Optional[Dict]:
+    def _find_mss(self, swept_point: int, data: Candles, opposite_swings: np.ndarray, direction: str) -> Optional[int]:
         """Find Market Structure Shift (MSS)"""
-        # Get swings before the swept point
-        relevant_swings = [s for s in opposite_swings if s['time'] < swept_point['time']]
+        # Swings come out of the scan in time order, so the most recent one
+        # before the swept point sits just left of its insertion position
+        swing_times = data.t[opposite_swings]
+        i = int(np.searchsorted(swing_times, data.t[swept_point], side='left')) - 1
         
-        if not relevant_swings:
+        if i < 0:
             return None
         
-        # Return the most recent swing before the swept point
-        return max(relevant_swings, key=lambda x: x['time'])
+        return int(opposite_swings[i])
 
-    def _find_poi_after_mss(self, mss_point: Dict, data: List[Dict], direction: str, is_1h: bool = False) -> Optional[Dict]:
+    def _find_poi_after_mss(self, mss_point: int, data: Candles, direction: str, is_1h: bool = False) -> Optional[int]:
         """Find Point of Interest (POI) after Market Structure Shift"""
-        # Get candles after MSS
-        search_range = [c for c in data if c['time'] > mss_point['time']]
-        if not search_range:
+        # Get candles after MSS as a view over the time-ordered columns
+        start = int(np.searchsorted(data.t, data.t[mss_point], side='right'))
+        if start >= len(data.t):
             return None
+        search_range = Candles._make(col[start:] for col in data)
         
         # Find order blocks
-        order_blocks = self._find_order_blocks(search_range, direction)
+        body = self._h1_body if is_1h else self._h4_body
+        order_blocks = self._find_order_blocks(search_range, direction, None if body is None else body[start:])
         
-        # Filter out already mitigated POIs
+        # Filter out already mitigated POIs in one vectorized membership test
         mitigated_pois = self.mitigated_h1_pois if is_1h else self.mitigated_h4_pois
-        valid_pois = [ob for ob in order_blocks if ob.get('time') not in mitigated_pois]
+        if len(mitigated_pois) and len(order_blocks):
+            order_blocks = order_blocks[~np.isin(search_range.t[order_blocks], mitigated_pois)]
         
         # Return the most recent valid POI
-        return valid_pois[-1] if valid_pois else None
+        return start + int(order_blocks[-1]) if len(order_blocks) else None
 
-    def _find_order_blocks(self, data: List[Dict], direction: str) -> List[Dict]:
-        """Find order blocks (POIs) in the data"""
-        order_blocks = []
-        
-        if len(data) < 2:
-            return order_blocks
-        
-        for i in range(1, len(data)):
-            prev_candle = data[i-1]
-            current_candle = data[i]
-            
-            # Check for strong momentum candle
-            prev_body = abs(prev_candle['close'] - prev_candle['open'])
-            current_body = abs(current_candle['close'] - current_candle['open'])
-            is_strong = current_body > prev_body
-            
-            if direction == "bullish":
-                # Look for bearish to bullish reversal with strong momentum
-                if (prev_candle['close'] < prev_candle['open'] and 
-                    current_candle['close'] > current_candle['open'] and 
-                    is_strong):
-                    order_blocks.append(prev_candle)
-            
-            elif direction == "bearish":
-                # Look for bullish to bearish reversal with strong momentum
-                if (prev_candle['close'] > prev_candle['open'] and 
-                    current_candle['close'] < current_candle['open'] and 
-                    is_strong):
-                    order_blocks.append(prev_candle)
-        
-        return order_blocks
+    def _find_order_blocks(self, data: Candles, direction: str, body: Optional[np.ndarray] = None) -> np.ndarray:
+        """Find order blocks (POIs) in the data as indices of the candle before the reversal"""
+        direction_code = OB_DIRECTIONS.get(direction)
+        if len(data.t) < 2 or direction_code is None:
+            return np.empty(0, dtype=np.int64)
 
-    def _is_mitigated(self, poi: Dict, data: List[Dict]) -> bool:
+        if body is None:
+            body = np.abs(data.c - data.o)
+        return _ob_kernel(data.o, data.c, body, direction_code)
+
+    def _mitigated_add(self, mitigated: np.ndarray, poi_time: int) -> np.ndarray:
+        """Insert a POI time into a sorted mitigation array, keeping it unique"""
+        idx = int(np.searchsorted(mitigated, poi_time))
+        if idx < len(mitigated) and mitigated[idx] == poi_time:
+            return mitigated
+        return np.insert(mitigated, idx, poi_time)
+
+    def _is_mitigated(self, poi: Optional[int], data: Candles) -> bool:
         """Check if a POI has been mitigated (price has touched it)"""
-        if not poi or 'time' not in poi:
+        if poi is None:
             return False
         
-        # Get candles after the POI
-        candles_after = [c for c in data if c.get('time', 0) > poi['time']]
-        
-        # Check if any candle has touched the POI range
-        for candle in candles_after:
-            if candle['low'] <= poi['high'] and candle['high'] >= poi['low']:
-                return True
-        
-        return False
+        # Candles are time-ordered, so the ones after the POI start right past its timestamp
+        start = int(np.searchsorted(data.t, data.t[poi], side='right'))
+
+        # Check if any candle after the POI has touched the POI range
+        return bool(np.any((data.l[start:] <= data.h[poi]) & (data.h[start:] >= data.l[poi])))
 
-    def _prepare_trade(self, bias: str, poi: Dict, h1_data: List[Dict]) -> Dict:
+    def _prepare_trade(self, bias: str, poi: int, h1: Candles, h1_swings: Tuple[np.ndarray, np.ndarray]) -> Dict:
         """Prepare trade parameters with risk analysis"""
         # Set entry based on POI
-        entry = float(poi['high'] if bias == "SELL" else poi['low'])
+        entry = float(h1.h[poi] if bias == "SELL" else h1.l[poi])
         
-        # Get swing points for TP calculation
-        swings = self._get_swing_points(h1_data)
+        # Swing points for TP calculation, as found by _get_1h_entry
+        swing_highs, swing_lows = h1_swings
         
         if bias == "BUY":
             # Stop loss below POI with buffer
-            sl = float(poi['low']) * 0.9995
+            sl = float(h1.l[poi]) * 0.9995
             
             # Take profit at next swing high or default
-            future_highs = [s for s in swings['highs'] if s.get('time', 0) > poi.get('time', 0)]
-            tp = float(future_highs[0]['high']) if future_highs else entry * 1.005
+            future_highs = swing_highs[np.searchsorted(h1.t[swing_highs], h1.t[poi], side='right'):]
+            tp = float(h1.h[future_highs[0]]) if len(future_highs) else entry * 1.005
         else:  # SELL
             # Stop loss above POI with buffer
-            sl = float(poi['high']) * 1.0005
+            sl = float(h1.h[poi]) * 1.0005
             
             # Take profit at next swing low or default
-            future_lows = [s for s in swings['lows'] if s.get('time', 0) > poi.get('time', 0)]
-            tp = float(future_lows[0]['low']) if future_lows else entry * 0.995
+            future_lows = swing_lows[np.searchsorted(h1.t[swing_lows], h1.t[poi], side='right'):]
+            tp = float(h1.l[future_lows[0]]) if len(future_lows) else entry * 0.995
         
         # Calculate risk analysis
-        risk_analysis = self._calculate_risk_score(bias, entry, sl, tp, h1_data, poi)
+        risk_analysis = self._calculate_risk_score(bias, entry, sl, tp, h1, poi)
         
         # Prepare trade dictionary
         trade = {
@@ -243,18 +496,18 @@ class SMCBot:
             "tp": tp,
             "risk_level": risk_analysis["level"],
             "risk_score": risk_analysis["score"],
-            "confidence": risk_analysis["confidence"],
+            "confidence": f"{risk_analysis['confidence_pct']}%",
             "recommendation": risk_analysis["recommendation"],
             "risk_factors": risk_analysis["factors"]
         }
         
         # Clear mitigated POIs after trade signal
-        self.mitigated_h1_pois.clear()
-        self.mitigated_h4_pois.clear()
+        self.mitigated_h1_pois = np.empty(0, dtype=np.int64)
+        self.mitigated_h4_pois = np.empty(0, dtype=np.int64)
         
         return trade
 
-    def _calculate_risk_score(self, bias: str, entry: float, sl: float, tp: float, h1_data: List[Dict], poi: Dict) -> Dict:
+    def _calculate_risk_score(self, bias: str, entry: float, sl: float, tp: float, h1: Candles, poi: int) -> Dict:
         """Calculate comprehensive risk analysis"""
         risk_factors = []
         score = 0
@@ -264,58 +517,29 @@ class SMCBot:
         reward = abs(tp - entry)
         rr_ratio = reward / risk if risk > 0 else 0
         
-        if rr_ratio >= 3:
-            score += 30
-            risk_factors.append("Excellent R:R ratio (1:3+)")
-        elif rr_ratio >= 2:
-            score += 20
-            risk_factors.append("Good R:R ratio (1:2+)")
-        elif rr_ratio >= 1.5:
-            score += 10
-            risk_factors.append("Acceptable R:R ratio (1:1.5+)")
-        else:
-            risk_factors.append("Poor R:R ratio (<1:1.5)")
+        idx = bisect.bisect_right(RR_THRESHOLDS, rr_ratio)
+        score += RR_SCORES[idx]
+        risk_factors.append(RR_LABELS[idx])
+        
+        # Sub-scores 2-5 come from a single pass over the H1 tail
+        poi_strength, structure_score, momentum_score, confluence = self._features(h1, poi, bias)
         
         # 2. POI Quality (25% of score)
-        poi_strength = self._analyze_poi_quality(poi, h1_data)
-        if poi_strength >= 0.8:
-            score += 25
-            risk_factors.append("Strong POI formation")
-        elif poi_strength >= 0.6:
-            score += 15
-            risk_factors.append("Good POI formation")
-        elif poi_strength >= 0.4:
-            score += 8
-            risk_factors.append("Weak POI formation")
-        else:
-            risk_factors.append("Very weak POI formation")
+        idx = bisect.bisect_right(POI_THRESHOLDS, poi_strength)
+        score += POI_SCORES[idx]
+        risk_factors.append(POI_LABELS[idx])
         
         # 3. Market Structure Alignment (20% of score)
-        structure_score = self._analyze_market_structure(h1_data, bias)
-        if structure_score >= 0.8:
-            score += 20
-            risk_factors.append("Strong market structure")
-        elif structure_score >= 0.6:
-            score += 12
-            risk_factors.append("Good market structure")
-        else:
-            score += 5
-            risk_factors.append("Weak market structure")
+        idx = bisect.bisect_right(STRUCTURE_THRESHOLDS, structure_score)
+        score += STRUCTURE_SCORES[idx]
+        risk_factors.append(STRUCTURE_LABELS[idx])
         
         # 4. Volume/Momentum (15% of score)
-        momentum_score = self._analyze_momentum(h1_data)
-        if momentum_score >= 0.7:
-            score += 15
-            risk_factors.append("Strong momentum")
-        elif momentum_score >= 0.5:
-            score += 10
-            risk_factors.append("Moderate momentum")
-        else:
-            score += 3
-            risk_factors.append("Weak momentum")
+        idx = bisect.bisect_right(MOMENTUM_THRESHOLDS, momentum_score)
+        score += MOMENTUM_SCORES[idx]
+        risk_factors.append(MOMENTUM_LABELS[idx])
         
         # 5. Confluence Factors (10% of score)
-        confluence = self._check_confluence(h1_data, poi)
         score += confluence * 10
         if confluence >= 0.7:
             risk_factors.append("Multiple confluence factors")
@@ -323,146 +547,109 @@ class SMCBot:
         # Determine risk level and recommendation
         if score >= 80:
             level = "LOW"
-            confidence = f"{min(99, 85 + (score-80)//2)}%"
+            confidence_pct = min(99, 85 + (score-80)//2)
             recommendation = "STRONG BUY/SELL - Execute Trade"
         elif score >= 60:
             level = "MEDIUM"
-            confidence = f"{min(85, 70 + (score-60)//3)}%"
+            confidence_pct = min(85, 70 + (score-60)//3)
             recommendation = "MODERATE - Consider Trade"
         elif score >= 40:
             level = "HIGH"
-            confidence = f"{min(70, 50 + (score-40)//4)}%"
+            confidence_pct = min(70, 50 + (score-40)//4)
             recommendation = "RISKY - Avoid Trade"
         else:
             level = "VERY HIGH"
-            confidence = f"{max(30, score)}%"
+            confidence_pct = max(30, score)
             recommendation = "DO NOT TRADE"
         
         return {
             "level": level,
             "score": score,
-            "confidence": confidence,
+            "confidence_pct": confidence_pct,
             "recommendation": recommendation,
             "factors": risk_factors,
             "rr_ratio": round(rr_ratio, 2)
         }
 
-    def _analyze_poi_quality(self, poi: Dict, h1_data: List[Dict]) -> float:
-        """Analyze POI formation quality"""
-        if not poi:
-            return 0.0
-        
-        score = 0.5  # Base score
-        
-        # Check candle body size
-        body_size = abs(poi['close'] - poi['open'])
-        candle_range = poi['high'] - poi['low']
-        
-        if body_size / candle_range > 0.7:  # Strong body
-            score += 0.3
-        elif body_size / candle_range > 0.5:
-            score += 0.2
-        
-        # Check wick rejection
-        if poi['close'] > poi['open']:  # Bullish
-            upper_wick = poi['high'] - poi['close']
-            lower_wick = poi['open'] - poi['low']
-            if lower_wick > upper_wick * 2:  # Strong rejection
-                score += 0.2
+    def _features(self, h1: Candles, poi: int, bias: str) -> Tuple[float, float, float, float]:
+        """Score POI quality, market structure, momentum and confluence from the H1 tail"""
+        n = len(h1.t)
+        # Every tail-based feature reads from the same last-10 window
+        tail_highs, tail_lows = h1.h[-10:], h1.l[-10:]
+        tail_ratio = self._h1_body_ratio[-10:]
+        
+        # POI quality: body strength plus wick rejection
+        poi_quality = 0.5  # Base score
+        poi_open, poi_high, poi_low, poi_close = (float(col[poi]) for col in (h1.o, h1.h, h1.l, h1.c))
+        body_ratio = float(self._h1_body_ratio[poi])
+        if body_ratio > 0.7:  # Strong body
+            poi_quality += 0.3
+        elif body_ratio > 0.5:
+            poi_quality += 0.2
+        if poi_close > poi_open:  # Bullish
+            if poi_open - poi_low > (poi_high - poi_close) * 2:  # Strong rejection
+                poi_quality += 0.2
         else:  # Bearish
-            upper_wick = poi['high'] - poi['open']
-            lower_wick = poi['close'] - poi['low']
-            if upper_wick > lower_wick * 2:  # Strong rejection
-                score += 0.2
-        
-        return min(1.0, score)
-
-    def _analyze_market_structure(self, h1_data: List[Dict], bias: str) -> float:
-        """Analyze market structure strength"""
-        if len(h1_data) < 5:
-            return 0.5
-        
-        recent_candles = h1_data[-5:]
-        
-        if bias == "BUY":
-            # Check for higher lows pattern
-            lows = [c['low'] for c in recent_candles]
-            higher_lows = sum(1 for i in range(1, len(lows)) if lows[i] >= lows[i-1])
-            return min(1.0, higher_lows / (len(lows) - 1))
+            if poi_high - poi_open > (poi_close - poi_low) * 2:  # Strong rejection
+                poi_quality += 0.2
+        poi_quality = min(1.0, poi_quality)
+        
+        # Market structure: share of higher lows (BUY) or lower highs (SELL) over five candles
+        if n < 5:
+            structure = 0.5
+        elif bias == "BUY":
+            structure = float((np.diff(tail_lows[-5:]) >= 0).mean())
         else:
-            # Check for lower highs pattern
-            highs = [c['high'] for c in recent_candles]
-            lower_highs = sum(1 for i in range(1, len(highs)) if highs[i] <= highs[i-1])
-            return min(1.0, lower_highs / (len(highs) - 1))
-
-    def _analyze_momentum(self, h1_data: List[Dict]) -> float:
-        """Analyze price momentum"""
-        if len(h1_data) < 3:
-            return 0.5
-        
-        recent = h1_data[-3:]
+            structure = float((np.diff(tail_highs[-5:]) <= 0).mean())
         
-        # Calculate average body size (momentum indicator)
-        body_sizes = [abs(c['close'] - c['open']) for c in recent]
-        ranges = [c['high'] - c['low'] for c in recent]
+        # Momentum: average body-to-range ratio of the last three candles
+        momentum = 0.5 if n < 3 else min(1.0, float(tail_ratio[-3:].mean()) * 1.5)
         
-        avg_body_ratio = sum(body_sizes[i] / ranges[i] for i in range(len(recent))) / len(recent)
-        
-        return min(1.0, avg_body_ratio * 1.5)
-
-    def _check_confluence(self, h1_data: List[Dict], poi: Dict) -> float:
-        """Check for confluence factors"""
+        # Confluence: round number, previous S/R and Fibonacci level at the POI low
+        entry_level = poi_low
         confluences = 0
-        total_factors = 3
-        
-        # 1. Round number levels
-        entry_level = poi.get('low', poi.get('high', 0))
         if self._is_round_number(entry_level):
             confluences += 1
-        
-        # 2. Previous support/resistance
-        if self._is_previous_sr_level(entry_level, h1_data):
+        if self._is_previous_sr_level(entry_level, h1):
             confluences += 1
-        
-        # 3. Fibonacci levels (simplified)
-        if self._is_fibonacci_level(entry_level, h1_data):
+        if n >= 10 and self._is_fibonacci_level(entry_level, self._rolling['h1_hi10'].value,
+                                                self._rolling['h1_lo10'].value):
             confluences += 1
         
-        return confluences / total_factors
+        return poi_quality, structure, momentum, confluences / 3
 
     def _is_round_number(self, price: float) -> bool:
         """Check if price is near round number"""
-        str_price = f"{price:.5f}"
-        last_digits = str_price[-2:]
-        return last_digits in ['00', '50'] or str_price[-3:] in ['000', '500']
+        # Price in units of the fifth decimal; ...000/...500 endings are covered by ...00/...50
+        units = int(round(price * 100000))
+        last_digits = units % 100
+        return last_digits == 0 or last_digits == 50
 
-    def _is_previous_sr_level(self, price: float, h1_data: List[Dict]) -> bool:
+    def _is_previous_sr_level(self, price: float, h1: Candles) -> bool:
         """Check if price is near previous support/resistance"""
         tolerance = price * 0.001  # 0.1% tolerance
         
-        for candle in h1_data[:-3]:  # Exclude recent candles
-            if abs(candle['high'] - price) <= tolerance or abs(candle['low'] - price) <= tolerance:
+        sr_levels = self._sr_sorted
+        if sr_levels is None:
+            # Exclude recent candles
+            sr_levels = np.sort(np.concatenate((h1.h[:-3], h1.l[:-3])))
+            self._sr_sorted = sr_levels
+        
+        # Only the nearest level on either side of the price can be within tolerance
+        idx = int(np.searchsorted(sr_levels, price))
+        for j in (idx - 1, idx):
+            if 0 <= j < len(sr_levels) and abs(sr_levels[j] - price) <= tolerance:
                 return True
         return False
 
-    def _is_fibonacci_level(self, price: float, h1_data: List[Dict]) -> bool:
-        """Simplified Fibonacci level check"""
-        if len(h1_data) < 10:
-            return False
-        
-        recent_high = max(c['high'] for c in h1_data[-10:])
-        recent_low = min(c['low'] for c in h1_data[-10:])
+    def _is_fibonacci_level(self, price: float, recent_high: float, recent_low: float) -> bool:
+        """Simplified Fibonacci level check against the recent high/low range"""
         range_size = recent_high - recent_low
         
-        fib_levels = [0.236, 0.382, 0.5, 0.618, 0.786]
+        fib_prices = recent_low + range_size * FIB_LEVELS
         tolerance = range_size * 0.02  # 2% tolerance
         
-        for fib in fib_levels:
-            fib_price = recent_low + (range_size * fib)
-            if abs(price - fib_price) <= tolerance:
-                return True
-        
-        return False
+        return bool(np.any(np.abs(price - fib_prices) <= tolerance))
 
     def _format_no_trade(self, reason: str, details: str) -> Dict:
         """Format no-trade response"""
@@ -48,29 +48,34 @@ def test_smc_analysis():
     print("-" * 40)
     
     # Check swing points
-    h4_swings = bot._get_swing_points(test_data["h4_data"])
-    h1_swings = bot._get_swing_points(test_data["h1_data"])
+    h4_swing_highs, h4_swing_lows = bot._get_swing_points(test_data["h4_data"])
+    h1_swing_highs, h1_swing_lows = bot._get_swing_points(test_data["h1_data"])
     
-    print(f"4H Swing Highs: {len(h4_swings['highs'])}")
-    for i, swing in enumerate(h4_swings['highs']):
+    print(f"4H Swing Highs: {len(h4_swing_highs)}")
+    for i, idx in enumerate(h4_swing_highs):
+        swing = test_data["h4_data"][idx]
         print(f"  High {i+1}: {swing['high']} at time {swing['time']}")
     
-    print(f"4H Swing Lows: {len(h4_swings['lows'])}")
-    for i, swing in enumerate(h4_swings['lows']):
+    print(f"4H Swing Lows: {len(h4_swing_lows)}")
+    for i, idx in enumerate(h4_swing_lows):
+        swing = test_data["h4_data"][idx]
         print(f"  Low {i+1}: {swing['low']} at time {swing['time']}")
     
-    print(f"\n1H Swing Highs: {len(h1_swings['highs'])}")
-    for i, swing in enumerate(h1_swings['highs']):
+    print(f"\n1H Swing Highs: {len(h1_swing_highs)}")
+    for i, idx in enumerate(h1_swing_highs):
+        swing = test_data["h1_data"][idx]
         print(f"  High {i+1}: {swing['high']} at time {swing['time']}")
     
-    print(f"1H Swing Lows: {len(h1_swings['lows'])}")
-    for i, swing in enumerate(h1_swings['lows']):
+    print(f"1H Swing Lows: {len(h1_swing_lows)}")
+    for i, idx in enumerate(h1_swing_lows):
+        swing = test_data["h1_data"][idx]
         print(f"  Low {i+1}: {swing['low']} at time {swing['time']}")
     
     # Test 4H bias
     print("\n4H BIAS Analysis:")
     print("-" * 20)
-    bias_result = bot._get_4h_bias(test_data["h4_data"])
+    h4_candles = bot._to_soa(test_data["h4_data"])
+    bias_result = bot._get_4h_bias(h4_candles)
     print(json.dumps(bias_result, indent=2))
     
     # Test liquidity sweeps
@@ -79,17 +84,19 @@ def test_smc_analysis():
     last_h4_candle = test_data["h4_data"][-1]
     last_h1_candle = test_data["h1_data"][-1]
     
-    h4_low_sweep = bot._find_liquidity_sweep(h4_swings['lows'], last_h4_candle, "low")
-    h4_high_sweep = bot._find_liquidity_sweep(h4_swings['highs'], last_h4_candle, "high")
+    h4_low_sweep = bot._find_liquidity_sweep(h4_candles, h4_swing_lows, "low")
+    h4_high_sweep = bot._find_liquidity_sweep(h4_candles, h4_swing_highs, "high")
     
-    print(f"4H Low Sweep: {'Found' if h4_low_sweep else 'None'}")
-    if h4_low_sweep:
-        print(f"  Swept Low: {h4_low_sweep['low']} at time {h4_low_sweep['time']}")
+    print(f"4H Low Sweep: {'Found' if h4_low_sweep is not None else 'None'}")
+    if h4_low_sweep is not None:
+        swept = test_data["h4_data"][h4_low_sweep]
+        print(f"  Swept Low: {swept['low']} at time {swept['time']}")
         print(f"  Current Low: {last_h4_candle['low']}")
     
-    print(f"4H High Sweep: {'Found' if h4_high_sweep else 'None'}")
-    if h4_high_sweep:
-        print(f"  Swept High: {h4_high_sweep['high']} at time {h4_high_sweep['time']}")
+    print(f"4H High Sweep: {'Found' if h4_high_sweep is not None else 'None'}")
+    if h4_high_sweep is not None:
+        swept = test_data["h4_data"][h4_high_sweep]
+        print(f"  Swept High: {swept['high']} at time {swept['time']}")
         print(f"  Current High: {last_h4_candle['high']}")
     
     print("\n" + "=" * 60)
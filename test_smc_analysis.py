@@ -0,0 +1,107 @@
+"""
+Tests for the SMC analysis kernels, the rolling H1 windows and a pinned end-to-end trade verdict
+"""
+import numpy as np
+import pytest
+
+import smc_analysis
+from smc_analysis import SMCBot, Candles, _swing_loop, _swing_numpy, _ob_loop, _ob_numpy
+
+# Sweep of the 4H and 1H lows, MSS and a tapped order block on both frames
+TRADE_H4 = [
+    {"time": 1719000000, "open": 100.0, "high": 101.0, "low": 99.5, "close": 100.0},
+    {"time": 1719014400, "open": 100.0, "high": 102.0, "low": 99.5, "close": 102.0},
+    {"time": 1719028800, "open": 102.0, "high": 103.0, "low": 101.5, "close": 101.5},
+    {"time": 1719043200, "open": 101.5, "high": 101.5, "low": 100.0, "close": 100.5},
+    {"time": 1719057600, "open": 100.5, "high": 102.0, "low": 100.0, "close": 102.0},
+    {"time": 1719072000, "open": 102.0, "high": 104.0, "low": 101.0, "close": 104.0},
+    {"time": 1719086400, "open": 104.0, "high": 105.5, "low": 99.0, "close": 105.0},
+]
+TRADE_H1 = [
+    {"time": 1719100800, "open": 100.0, "high": 100.0, "low": 98.5, "close": 99.5},
+    {"time": 1719104400, "open": 99.5, "high": 100.0, "low": 98.5, "close": 99.0},
+    {"time": 1719108000, "open": 99.0, "high": 99.5, "low": 98.0, "close": 98.0},
+    {"time": 1719111600, "open": 98.0, "high": 98.0, "low": 95.5, "close": 96.5},
+    {"time": 1719115200, "open": 96.5, "high": 98.0, "low": 96.5, "close": 98.0},
+    {"time": 1719118800, "open": 98.0, "high": 98.0, "low": 96.0, "close": 96.0},
+    {"time": 1719122400, "open": 96.0, "high": 96.0, "low": 95.5, "close": 95.5},
+    {"time": 1719126000, "open": 95.5, "high": 101.5, "low": 95.0, "close": 101.0},
+]
+
+def _random_ohlc(rng, n):
+    """Integer-priced candles, so equal neighbouring highs/lows, equal bodies and dojis are common"""
+    o = rng.integers(95, 106, n).astype(np.float64)
+    c = np.where(rng.random(n) < 0.2, o, rng.integers(95, 106, n)).astype(np.float64)
+    h = np.maximum(o, c) + rng.integers(0, 3, n)
+    l = np.minimum(o, c) - rng.integers(0, 3, n)
+    return o, h, l, c
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kernel_forms_agree(seed):
+    rng = np.random.default_rng(seed)
+    for n in (0, 1, 2, 3, 5, 50, 500):
+        o, h, l, c = _random_ohlc(rng, n)
+        body = np.abs(c - o)
+
+        swings = [_swing_loop(h, l), _swing_numpy(h, l), smc_analysis._swing_kernel(h, l)]
+        for highs, lows in swings[1:]:
+            assert np.array_equal(highs, swings[0][0])
+            assert np.array_equal(lows, swings[0][1])
+
+        for direction_code in smc_analysis.OB_DIRECTIONS.values():
+            blocks = [_ob_loop(o, c, body, direction_code), _ob_numpy(o, c, body, direction_code),
+                      smc_analysis._ob_kernel(o, c, body, direction_code)]
+            for got in blocks[1:]:
+                assert np.array_equal(got, blocks[0])
+
+@pytest.mark.parametrize("kernels", [(_swing_loop, _ob_loop), (_swing_numpy, _ob_numpy)])
+def test_trade_verdict(monkeypatch, kernels):
+    monkeypatch.setattr(smc_analysis, '_swing_kernel', kernels[0])
+    monkeypatch.setattr(smc_analysis, '_ob_kernel', kernels[1])
+    bot = SMCBot("TEST_PAIR")
+    result = bot.analyze(TRADE_H4, TRADE_H1)
+
+    assert result["action"] == "taketrade"
+    assert result["order_type"] == "BUY"
+    assert result["entry"] == 95.5
+    assert result["sl"] == pytest.approx(95.5 * 0.9995)
+    assert result["tp"] == pytest.approx(95.5 * 1.005)
+    assert result["risk_level"] == "LOW"
+    assert result["risk_score"] == pytest.approx(81.66666666666667)
+    assert result["risk_factors"] == ["Excellent R:R ratio (1:3+)", "Strong POI formation",
+                                      "Weak market structure", "Strong momentum"]
+    # A trade signal clears the mitigation state
+    assert len(bot.mitigated_h4_pois) == 0 and len(bot.mitigated_h1_pois) == 0
+
+def _random_candles(rng, n, t0, shift=0.0):
+    o, h, l, c = (col + shift for col in _random_ohlc(rng, n))
+    return Candles(t=t0 + 3600 * np.arange(n, dtype=np.int64), o=o, h=h, l=l, c=c)
+
+def test_rolling_windows_match_full_rescan():
+    rng = np.random.default_rng(0)
+    h4 = SMCBot("TEST_PAIR")._to_soa(TRADE_H4)
+    full = _random_candles(rng, 300, 1719000000)
+    # (first, end) slices of `full`: single appends, appends wider than the window,
+    # then a front-trimmed window sliding like the trader's candle store
+    slices = [(0, end) for end in range(5, 30)]
+    slices += [(0, 41), (0, 56), (0, 57), (0, 90)]
+    slices += [(end - 60, end) for end in range(91, 130)]
+    slices += [(end - 60, end) for end in range(133, 200, 3)]
+    slices += [(190, 250), (215, 251), (251, 300)]
+
+    bot = SMCBot("TEST_PAIR")
+
+    def check(h1):
+        bot.analyze(h4, h1)
+        assert bot._rolling['h1_hi10'].value == h1.h[-10:].max()
+        assert bot._rolling['h1_lo10'].value == h1.l[-10:].min()
+
+    for first, end in slices:
+        check(Candles._make(col[first:end] for col in full))
+
+    # Fully replaced series, both later and earlier than the one seen last, then growing again;
+    # shifted price levels make any value left over from the old series show up
+    for t0, shift in ((1729000000, 50.0), (1709000000, -50.0)):
+        replaced = _random_candles(rng, 40, t0, shift)
+        for end in (8, 9, 25, 40):
+            check(Candles._make(col[:end] for col in replaced))
@@ -0,0 +1,109 @@
+"""
+Tests for the trader's sliding candle window, incremental swing points and batched tick handling
+"""
+import json
+import random
+import time
+
+import numpy as np
+import pytest
+
+import trading_bot
+from smc_analysis import SMCBot, _swing_kernel
+
+@pytest.mark.parametrize("max_candles", [5, 7])
+def test_candle_window_matches_full_rescan(max_candles):
+    rng = random.Random(max_candles)
+    tr = trading_bot.LiveOandaTrader('EUR_USD')
+    # Tiny buffers so growth, sliding back to the front and swing pruning all happen
+    store = tr.h1_candles['EUR_USD'] = trading_bot._new_candle_store(max_candles, capacity=2)
+    swings = tr.h1_swings['EUR_USD'] = trading_bot._new_swing_store(capacity=2)
+
+    closed = []
+    for k in range(20 * max_candles):
+        # Integer prices make equal neighbouring highs/lows common
+        o, c = rng.randint(95, 105), rng.randint(95, 105)
+        bar = np.array([o, max(o, c) + rng.randint(0, 3), min(o, c) - rng.randint(0, 3), c], dtype=np.float64)
+        closed.append((k * 3600, *bar))
+
+        total = tr._append_candle(store, k * 3600, bar)
+        tr._maybe_add_swing('EUR_USD', 'h1')
+        assert total == len(closed)
+
+        view = tr.candle_view('EUR_USD', 'h1')
+        expected = np.array(closed[-max_candles:]).T
+        for got, want in zip(view, expected):
+            assert np.array_equal(got, want)
+
+        for got, want in zip(tr.swing_view('EUR_USD', 'h1'), _swing_kernel(view.h, view.l)):
+            assert np.array_equal(got, want)
+
+    assert len(store['time']) == 2 * max_candles
+    assert len(swings['highs']) <= 2 * max_candles and len(swings['lows']) <= 2 * max_candles
+
+def _tick_lines(seed, hours=150):
+    """Synthetic pricing stream: bursts, repeated quotes, heartbeats and junk lines"""
+    rng = random.Random(seed)
+    t = 1717372800  # 2024-06-03T00:00:00Z
+    end = t + hours * 3600
+    px = {'EUR_USD': 1.07, 'USD_JPY': 157.0, 'GBP_USD': 1.27}
+    lines = []
+    while t < end:
+        t += rng.randint(1, 300)
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(t)) + '.123456789Z'
+        if rng.random() < 0.05:
+            lines.append(json.dumps({"type": "HEARTBEAT", "time": stamp}).encode())
+            continue
+        inst = rng.choice(list(px))
+        digits, scale = (3, 0.01) if 'JPY' in inst else (5, 0.0001)
+        px[inst] += rng.gauss(0, 3 * scale) + (rng.choice((-40, 40)) * scale if rng.random() < 0.02 else 0)
+        tick = {"type": "PRICE", "time": stamp, "instrument": inst,
+                "bids": [{"price": f"{px[inst] - scale:.{digits}f}", "liquidity": 1000000}],
+                "asks": [{"price": f"{px[inst] + scale:.{digits}f}", "liquidity": 1000000}]}
+        lines.append(json.dumps(tick).encode())
+        if rng.random() < 0.2:
+            lines.append(json.dumps(tick).encode())
+        if rng.random() < 0.01:
+            lines += [b'', b'{not json']
+    return lines
+
+def _replay(lines, batches):
+    """Feed lines to a fresh trader in consecutive batches of the given sizes"""
+    tr = trading_bot.LiveOandaTrader('EUR_USD,USD_JPY,GBP_USD')
+    logged = []
+    tr._add_log = lambda message: logged.append(message)
+    i = 0
+    for size in batches:
+        tr._handle_lines(lines[i:i + size])
+        i += size
+    return tr, logged
+
+def test_batched_ticks_match_tick_by_tick(monkeypatch):
+    real = SMCBot.analyze_incremental
+
+    # Open a trade every 7th H1 close so the SL/TP path interleaves with folded runs
+    def analyze_incremental(self, h4, h1, h4_swings, h1_swings):
+        result = real(self, h4, h1, h4_swings, h1_swings)
+        n = len(h1.t)
+        if result['action'] != 'taketrade' and n % 7 == 0:
+            last, sign = float(h1.c[-1]), 1 if n % 14 == 0 else -1
+            result = {"action": "taketrade", "order_type": "BUY" if sign > 0 else "SELL", "entry": last,
+                      "sl": last * (1 - sign * 0.0008), "tp": last * (1 + sign * 0.0012)}
+        return result
+    monkeypatch.setattr(SMCBot, 'analyze_incremental', analyze_incremental)
+
+    rng = random.Random(3)
+    lines = _tick_lines(3)
+    single, single_logs = _replay(lines, [1] * len(lines))
+    batched, batched_logs = _replay(lines, [rng.randint(1, 200) for _ in range(len(lines))])
+
+    assert any('TAKE TRADE' in m for m in single_logs) and any('HIT AT' in m for m in single_logs)
+    assert batched_logs == single_logs
+    assert batched.spinner_index == single.spinner_index
+    for inst in single.instrument_list:
+        assert batched.state['instruments'][inst] == single.state['instruments'][inst]
+        assert np.array_equal(batched.current_h1_candle[inst], single.current_h1_candle[inst])
+        assert np.array_equal(batched.current_h4_candle[inst], single.current_h4_candle[inst])
+        for tf in ('h1', 'h4'):
+            for got, want in zip(batched.candle_view(inst, tf), single.candle_view(inst, tf)):
+                assert np.array_equal(got, want)
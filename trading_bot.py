@@ -1,16 +1,146 @@
 import requests
-import json
-from datetime import datetime, timezone
+import socket
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from collections import deque
+import queue
+from datetime import datetime, timezone, date
+from functools import lru_cache
 import time
 import os
 from typing import List, Dict, Optional
-from smc_analysis import SMCBot
+import numpy as np
+import _fastjson
+from _njit import njit
+from smc_analysis import SMCBot, Candles, swing_flags
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional; stream lines are then decoded to dicts via _fastjson
+    msgspec = None
 
 # Configuration
 ACCESS_TOKEN = os.getenv('OANDA_ACCESS_TOKEN', '672f8f548ea2c0259ce2e043a27ccdf7-accd7e47d49e5eb316003deadbf45c56')
 ACCOUNT_ID = os.getenv('OANDA_ACCOUNT_ID', '101-001-35653324-001')
 ENVIRONMENT = os.getenv('OANDA_ENVIRONMENT', 'practice')
 
+# Initial number of candle slots per instrument/timeframe; doubled when full
+CANDLE_CAPACITY = 512
+
+# Most recent closed candles kept per instrument; older ones are dropped
+MAX_H1_CANDLES = 2000
+MAX_H4_CANDLES = 1000
+
+CANDLE_COLUMNS = ('time', 'open', 'high', 'low', 'close')
+
+def _new_candle_store(max_candles: int, capacity: int = CANDLE_CAPACITY) -> Dict:
+    """Preallocated column arrays holding a sliding window of the last max_candles closed candles.
+
+    The window is buffer[start:n]. Buffer slot 0 holds candle number seq0 counted
+    since startup, so swing points can be stored as absolute candle numbers.
+    """
+    capacity = min(capacity, 2 * max_candles)
+    return {
+        'time': np.empty(capacity, dtype=np.int64),
+        'open': np.empty(capacity, dtype=np.float64),
+        'high': np.empty(capacity, dtype=np.float64),
+        'low': np.empty(capacity, dtype=np.float64),
+        'close': np.empty(capacity, dtype=np.float64),
+        'start': 0,
+        'n': 0,
+        'seq0': 0,
+        'max': max_candles
+    }
+
+def _new_swing_store(capacity: int = CANDLE_CAPACITY // 4) -> Dict:
+    """Append-only swing high/low absolute candle numbers, pruned as the candle window slides"""
+    return {
+        'highs': np.empty(capacity, dtype=np.int64),
+        'lows': np.empty(capacity, dtype=np.int64),
+        'n_highs': 0,
+        'n_lows': 0
+    }
+
+if msgspec is not None:
+    class _Quote(msgspec.Struct):
+        price: float
+
+    class _Tick(msgspec.Struct):
+        """The fields of an OANDA pricing stream message that the trader reads"""
+        type: str = ''
+        instrument: str = ''
+        time: str = ''
+        bids: List[_Quote] = []
+        asks: List[_Quote] = []
+
+    # strict=False lets the decoder turn OANDA's string prices into floats
+    _decode_tick = msgspec.json.Decoder(_Tick, strict=False).decode
+    _TickInvalid = msgspec.ValidationError
+    _TickMalformed = msgspec.DecodeError
+else:
+    _decode_tick = _fastjson.loads
+    _TickInvalid = ()
+    _TickMalformed = _fastjson.JSONDecodeError
+
+# Bytes requested per read from the pricing stream
+STREAM_CHUNK_SIZE = 65536
+
+# Seconds the Socket.IO emit writer sleeps between queue drains
+EMIT_INTERVAL = 0.05
+
+# Kernel receive buffer requested for the pricing stream socket
+STREAM_RCVBUF = 1 << 20
+
+class _StreamAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets get a large receive buffer and TCP keepalive"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        # urllib3's defaults already set TCP_NODELAY
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_RCVBUF, STREAM_RCVBUF),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+# Candle bucket widths in seconds
+H1_SECONDS = 3600
+H4_SECONDS = 4 * 3600
+
+# Proleptic ordinal of 1970-01-01
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+@lru_cache(maxsize=64)
+def _day_epoch(day: str) -> int:
+    """Epoch seconds at midnight UTC for a YYYY-MM-DD string"""
+    return (date.fromisoformat(day).toordinal() - _EPOCH_ORDINAL) * 86400
+
+def _rfc3339_epoch(ts: str) -> int:
+    """Whole epoch seconds of an OANDA RFC3339 UTC timestamp (YYYY-MM-DDTHH:MM:SS[.fffffffff]Z)"""
+    if not ts.endswith('Z'):
+        return int(datetime.fromisoformat(ts).timestamp())
+    return _day_epoch(ts[:10]) + int(ts[11:13]) * 3600 + int(ts[14:16]) * 60 + int(ts[17:19])
+
+# Typed eagerly so the cached machine code is loaded at import, not compiled on the first tick
+@njit('void(f8[:], f8)', cache=True)
+def _ohlc_update(bar, price):
+    """Fold a price into an in-progress [open, high, low, close] bar in place"""
+    if price > bar[1]:
+        bar[1] = price
+    if price < bar[2]:
+        bar[2] = price
+    bar[3] = price
+
+@njit('void(f8[:], f8[:])', cache=True)
+def _ohlc_fold(bar, prices):
+    """Fold a run of prices into an in-progress [open, high, low, close] bar in place"""
+    high = prices.max()
+    if high > bar[1]:
+        bar[1] = high
+    low = prices.min()
+    if low < bar[2]:
+        bar[2] = low
+    bar[3] = prices[-1]
+
 class LiveOandaTrader:
     def __init__(self, instruments: str, socketio=None):
         self.socketio = socketio
@@ -18,10 +148,22 @@ class LiveOandaTrader:
         self.url = f'https://{self.domain}/v3/accounts/{ACCOUNT_ID}/pricing/stream'
         self.headers = {'Authorization': f'Bearer {ACCESS_TOKEN}'}
         self.params = {'instruments': instruments}
+        # One keep-alive session for every (re)connect to the pricing stream
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('https://', _StreamAdapter(pool_connections=1, pool_maxsize=1))
         self.instrument_list = instruments.split(',')
+        self.instrument_set = frozenset(self.instrument_list)  # O(1) per-tick membership test
         self.start_time = time.time()
-        self.logs = []
+        # Whole seconds the cached uptime string was formatted for
+        self._uptime_sec = -1
+        self.logs = deque(maxlen=100)  # oldest entries drop off automatically
         self.running = False
+
+        # Events for Socket.IO, emitted by one writer task instead of the stream thread
+        self._emit_q = queue.SimpleQueue()
+        if self.socketio:
+            self.socketio.start_background_task(self._emit_writer)
         
         # Spinner animation
         self.spinner_chars = ['|', '/', '—', '\\']
@@ -41,13 +183,21 @@ class LiveOandaTrader:
             } for inst in self.instrument_list},
             'logs': self.logs
         }
+        # Instruments whose dashboard fields changed since the last diff broadcast
+        self._dirty = set()
         
         # Bot Logic State Management
         self.smc_bots = {inst: SMCBot(inst) for inst in self.instrument_list}
-        self.h1_candles = {inst: [] for inst in self.instrument_list}
-        self.h4_candles = {inst: [] for inst in self.instrument_list}
+        self.h1_candles = {inst: _new_candle_store(MAX_H1_CANDLES) for inst in self.instrument_list}
+        self.h4_candles = {inst: _new_candle_store(MAX_H4_CANDLES) for inst in self.instrument_list}
+        # Swing points, extended as each candle closes instead of rescanned per analysis
+        self.h1_swings = {inst: _new_swing_store() for inst in self.instrument_list}
+        self.h4_swings = {inst: _new_swing_store() for inst in self.instrument_list}
+        # In-progress candles as [open, high, low, close] float64 arrays
         self.current_h1_candle = {inst: None for inst in self.instrument_list}
         self.current_h4_candle = {inst: None for inst in self.instrument_list}
+        self.current_h1_start = {inst: None for inst in self.instrument_list}  # bucket index
+        self.current_h4_start = {inst: None for inst in self.instrument_list}  # bucket index
 
     def get_spinner(self):
         """Get next spinner character"""
@@ -55,12 +205,29 @@ class LiveOandaTrader:
         self.spinner_index = (self.spinner_index + 1) % len(self.spinner_chars)
         return char
 
+    def _update_uptime(self):
+        """Refresh the uptime string in the dashboard state, at most once per second"""
+        uptime_seconds = int(time.time() - self.start_time)
+        if uptime_seconds != self._uptime_sec:
+            self._uptime_sec = uptime_seconds
+            self.state['uptime'] = f"{uptime_seconds // 3600}h {(uptime_seconds % 3600) // 60}m {uptime_seconds % 60}s"
+
     def get_dashboard_state(self):
         """Get current dashboard state"""
-        # Update uptime
-        uptime_seconds = int(time.time() - self.start_time)
-        self.state['uptime'] = f"{uptime_seconds // 3600}h {(uptime_seconds % 3600) // 60}m {uptime_seconds % 60}s"
-        return self.state
+        self._update_uptime()
+        # The log deque is not JSON serializable; hand out a list snapshot
+        return {**self.state, 'logs': list(self.logs)}
+
+    def get_dashboard_diff(self):
+        """Get the dashboard fields that changed since the previous call (logs go out via 'new_log')"""
+        self._update_uptime()
+        dirty, self._dirty = self._dirty, set()
+        instruments = self.state['instruments']
+        return {
+            'connection_status': self.state['connection_status'],
+            'uptime': self.state['uptime'],
+            'instruments': {inst: instruments[inst] for inst in dirty}
+        }
 
     def _add_log(self, message: str):
         """Add log message with timestamp"""
@@ -68,161 +235,299 @@ class LiveOandaTrader:
         log_entry = f"[{timestamp}] {message}"
         self.logs.append(log_entry)
         
-        # Keep only last 100 logs to prevent memory issues
-        if len(self.logs) > 100:
-            self.logs = self.logs[-100:]
-        
-        # Emit log update if socketio is available
+        # Queue log update for the emit writer if socketio is available
         if self.socketio:
-            self.socketio.emit('new_log', {'message': log_entry})
+            self._emit_q.put(('new_log', {'message': log_entry}))
+
+    def _emit_writer(self):
+        """Drain queued events into socketio.emit until stream() queues the None sentinel"""
+        while True:
+            # Non-blocking gets: a blocking get would stall the server's event loop
+            try:
+                while True:
+                    item = self._emit_q.get_nowait()
+                    if item is None:
+                        return
+                    self.socketio.emit(*item)
+            except queue.Empty:
+                pass
+            self.socketio.sleep(EMIT_INTERVAL)
+
+    def _append_candle(self, store: Dict, start_time: int, bar: np.ndarray) -> int:
+        """Write a closed [open, high, low, close] bar at the store cursor and return the total closed so far"""
+        start, n = store['start'], store['n']
+        if n == len(store['time']):
+            if n < 2 * store['max']:
+                # Still warming up: double the buffer, up to twice the window size
+                size = min(2 * n, 2 * store['max'])
+                for key in CANDLE_COLUMNS:
+                    store[key] = np.resize(store[key], size)
+            else:
+                # Buffer full: slide the window back to the front, so views stay contiguous
+                for key in CANDLE_COLUMNS:
+                    store[key][:n - start] = store[key][start:n]
+                store['seq0'] += start
+                start, n = 0, n - start
+        store['time'][n] = start_time
+        store['open'][n] = bar[0]
+        store['high'][n] = bar[1]
+        store['low'][n] = bar[2]
+        store['close'][n] = bar[3]
+        n += 1
+        if n - start > store['max']:
+            start += 1
+        store['start'], store['n'] = start, n
+        # Slot p holds candle number seq0 + p, so this counts candles dropped from the window too
+        return store['seq0'] + n
 
-    def _update_candle(self, candle: Optional[Dict], price: float) -> Dict:
+    def _maybe_add_swing(self, inst: str, timeframe: str):
+        """Record the candle before the one just closed if it is now a confirmed swing"""
+        candles = self.candle_view(inst, timeframe)
+        i = len(candles.t) - 2
+        if i < 1:
+            return
+        store = self.h1_candles[inst] if timeframe == 'h1' else self.h4_candles[inst]
+        swings = self.h1_swings[inst] if timeframe == 'h1' else self.h4_swings[inst]
+        first = store['seq0'] + store['start']
+        for side, is_swing in zip(('highs', 'lows'), swing_flags(candles.h, candles.l, i)):
+            if not is_swing:
+                continue
+            count = 'n_' + side
+            n = swings[count]
+            if n == len(swings[side]):
+                # Drop swings that left the candle window before growing
+                keep = swings[side][int(np.searchsorted(swings[side], first, side='right')):n]
+                n = len(keep)
+                swings[side][:n] = keep
+                if 2 * n >= len(swings[side]):
+                    swings[side] = np.resize(swings[side], 2 * len(swings[side]))
+            swings[side][n] = first + i
+            swings[count] = n + 1
+
+    def swing_view(self, inst: str, timeframe: str = 'h1') -> tuple:
+        """(high_idx, low_idx) index arrays into candle_view() for one instrument"""
+        store = self.h1_candles[inst] if timeframe == 'h1' else self.h4_candles[inst]
+        swings = self.h1_swings[inst] if timeframe == 'h1' else self.h4_swings[inst]
+        first = store['seq0'] + store['start']
+        out = []
+        for side in ('highs', 'lows'):
+            seq = swings[side][:swings['n_' + side]]
+            # The oldest candle in the window has no left neighbor, so it cannot be a swing
+            out.append(seq[np.searchsorted(seq, first, side='right'):] - first)
+        return tuple(out)
+
+    def candle_view(self, inst: str, timeframe: str = 'h1') -> Candles:
+        """Zero-copy Candles view over the closed candles of one instrument"""
+        store = self.h1_candles[inst] if timeframe == 'h1' else self.h4_candles[inst]
+        start, n = store['start'], store['n']
+        return Candles(
+            t=store['time'][start:n],
+            o=store['open'][start:n],
+            h=store['high'][start:n],
+            l=store['low'][start:n],
+            c=store['close'][start:n],
+        )
+
+    def _update_candle(self, candle: Optional[np.ndarray], price: float) -> np.ndarray:
         """Update candle data with new price"""
-        if not candle:
-            return {
-                'open': price,
-                'high': price,
-                'low': price,
-                'close': price,
-                'start_time': None
-            }
-        
-        candle['high'] = max(candle['high'], price)
-        candle['low'] = min(candle['low'], price)
-        candle['close'] = price
+        if candle is None:
+            return np.full(4, price, dtype=np.float64)
+
+        _ohlc_update(candle, price)
         return candle
 
-    def _handle_tick(self, tick: Dict):
-        """Process incoming price tick"""
-        try:
-            if tick.get('type') != 'PRICE':
-                return
-            
-            inst = tick['instrument']
-            if inst not in self.instrument_list:
-                return
-            
-            # Calculate mid price
-            price = (float(tick['bids'][0]['price']) + float(tick['asks'][0]['price'])) / 2
-            timestamp = datetime.fromisoformat(tick['time'].replace('Z', '+00:00'))
+    def _parse_tick(self, tick: Dict) -> Optional[tuple]:
+        """(instrument, mid price, epoch seconds) of a PRICE tick for a tracked instrument, else None"""
+        if tick.get('type') != 'PRICE':
+            return None
+        
+        inst = tick['instrument']
+        if inst not in self.instrument_set:
+            return None
+        
+        # Calculate mid price
+        price = (float(tick['bids'][0]['price']) + float(tick['asks'][0]['price'])) / 2
+        return inst, price, _rfc3339_epoch(tick['time'])
 
-            # Update dashboard state
-            self.state['instruments'][inst]['price'] = price
-            self.state['instruments'][inst]['spinner'] = self.get_spinner()
+    def _parse_tick_struct(self, tick) -> Optional[tuple]:
+        """_parse_tick for a msgspec-decoded _Tick, whose prices are already floats"""
+        if tick.type != 'PRICE':
+            return None
 
-            # Track active trade P/L
-            if self.state['instruments'][inst]['active_trade']:
-                self._track_active_trade(inst, price)
-            
-            # Aggregate candles
-            self._aggregate_candles(inst, price, timestamp)
-            
-        except (KeyError, IndexError, ValueError) as e:
-            self._add_log(f"Error processing tick: {str(e)}")
+        inst = tick.instrument
+        if inst not in self.instrument_set:
+            return None
 
-    def _track_active_trade(self, inst: str, price: float):
-        """Track P/L for active trades"""
-        trade = self.state['instruments'][inst]['active_trade']
-        entry, sl, tp = trade['entry'], trade['sl'], trade['tp']
-        pips_multiplier = 100 if 'JPY' in inst else 10000
-
-        if trade['order_type'] == 'BUY':
-            pips = (price - entry) * pips_multiplier
-            if price <= sl:
-                self._close_trade(inst, price, "STOP LOSS")
-            elif price >= tp:
-                self._close_trade(inst, price, "TAKE PROFIT")
-        else:  # SELL
-            pips = (entry - price) * pips_multiplier
-            if price >= sl:
-                self._close_trade(inst, price, "STOP LOSS")
-            elif price <= tp:
-                self._close_trade(inst, price, "TAKE PROFIT")
+        return inst, (tick.bids[0].price + tick.asks[0].price) / 2, _rfc3339_epoch(tick.time)
+
+    def _process_tick(self, inst: str, price: float, epoch: int):
+        """Apply one parsed tick to the dashboard state, active trade and candles"""
+        inst_state = self.state['instruments'][inst]
+
+        # Update dashboard state
+        inst_state['price'] = price
+        inst_state['spinner'] = self.get_spinner()
+        self._dirty.add(inst)
+
+        # Track active trade P/L
+        if inst_state['active_trade']:
+            self._track_active_trade(inst, price, inst_state)
         
-        # Update P/L if trade is still active
-        if self.state['instruments'][inst]['active_trade']:
-            self.state['instruments'][inst]['active_trade']['live_pnl_pips'] = pips
+        # Aggregate candles
+        self._aggregate_candles(inst, price, epoch, inst_state)
+
+    def _handle_lines(self, lines: List[bytes]):
+        """Decode and process a burst of stream lines, folding same-candle runs per instrument into one bar update"""
+        # A tick in the same H1 and H4 candles as its instrument's previous tick, with no
+        # trade open, cannot close a candle or hit SL/TP; it only moves price, spinner and
+        # the in-progress bars, so such runs are deferred and applied together
+        parse = self._parse_tick_struct if msgspec is not None else self._parse_tick
+        instruments = self.state['instruments']
+        # inst -> [h1 bucket, h4 bucket, deferred prices, last spinner char]
+        runs = {}
+        for line in lines:
+            if not line:
+                continue
+            try:
+                tick = _decode_tick(line)
+            except _TickInvalid as e:
+                # Well-formed JSON with unusable fields, e.g. a non-numeric price
+                self._add_log(f"Error processing tick: {str(e)}")
+                continue
+            except _TickMalformed:
+                continue
+
+            try:
+                parsed = parse(tick)
+                if parsed is None:
+                    continue
+                inst, price, epoch = parsed
+                run = runs.get(inst)
+                if (run is not None and run[0] == epoch // H1_SECONDS and run[1] == epoch // H4_SECONDS
+                        and not instruments[inst]['active_trade']):
+                    run[2].append(price)
+                    # The spinner advances on every tick across instruments
+                    run[3] = self.get_spinner()
+                    continue
+                self._flush_tick_run(inst, run)
+                self._process_tick(inst, price, epoch)
+                runs[inst] = [epoch // H1_SECONDS, epoch // H4_SECONDS, [], None]
+            except (KeyError, IndexError, ValueError) as e:
+                self._add_log(f"Error processing tick: {str(e)}")
+
+        for inst, run in runs.items():
+            self._flush_tick_run(inst, run)
+
+    def _flush_tick_run(self, inst: str, run: Optional[list]):
+        """Apply the prices deferred by _handle_lines for one instrument"""
+        if not run or not run[2]:
+            return
+        prices = np.array(run[2], dtype=np.float64)
+        _ohlc_fold(self.current_h1_candle[inst], prices)
+        _ohlc_fold(self.current_h4_candle[inst], prices)
+        inst_state = self.state['instruments'][inst]
+        inst_state['price'] = run[2][-1]
+        inst_state['spinner'] = run[3]
+        self._dirty.add(inst)
+        run[2] = []
+
+    def _track_active_trade(self, inst: str, price: float, inst_state: Dict):
+        """Track P/L for active trades"""
+        trade = inst_state['active_trade']
+        # sign is +1 for BUY and -1 for SELL, so one expression covers both directions
+        sign = trade['sign']
+
+        if (price - trade['sl']) * sign <= 0:
+            self._close_trade(inst, price, "STOP LOSS")
+        elif (price - trade['tp']) * sign >= 0:
+            self._close_trade(inst, price, "TAKE PROFIT")
+        else:
+            trade['live_pnl_pips'] = (price - trade['entry']) * sign * trade['pips_mul']
 
     def _close_trade(self, inst: str, price: float, reason: str):
         """Close active trade"""
         self._add_log(f"🎯 [{inst}] {reason} HIT AT {price}")
         self.state['instruments'][inst]['active_trade'] = None
+        self._dirty.add(inst)
 
-    def _aggregate_candles(self, inst: str, price: float, timestamp: datetime):
+    def _aggregate_candles(self, inst: str, price: float, epoch: int, inst_state: Dict):
         """Aggregate tick data into candles"""
-        current_h1_start_time = timestamp.replace(minute=0, second=0, microsecond=0)
-        current_h4_start_time = timestamp.replace(hour=(timestamp.hour//4)*4, minute=0, second=0, microsecond=0)
+        # Candles are keyed by integer bucket index: epoch // bucket width
+        current_h1_bucket = epoch // H1_SECONDS
+        current_h4_bucket = epoch // H4_SECONDS
+        h1 = self.current_h1_candle[inst]
+        h4 = self.current_h4_candle[inst]
         
         # 1H Candles
-        if self.current_h1_candle[inst] is None:
-            self.current_h1_candle[inst] = self._update_candle(None, price)
-            self.current_h1_candle[inst]['start_time'] = current_h1_start_time
+        if h1 is None:
+            h1 = self.current_h1_candle[inst] = self._update_candle(None, price)
+            self.current_h1_start[inst] = current_h1_bucket
         
-        if current_h1_start_time > self.current_h1_candle[inst]['start_time']:
-            # Close current candle
-            c = self.current_h1_candle[inst]
-            final_candle = {
-                "time": int(c['start_time'].timestamp()),
-                "open": c['open'],
-                "high": c['high'],
-                "low": c['low'],
-                "close": c['close'],
-                "volume": 0
-            }
-            self.h1_candles[inst].append(final_candle)
-            self.state['instruments'][inst]['h1_candles_count'] = len(self.h1_candles[inst])
-            self._add_log(f"🕯️ [{inst}] New 1H Candle Closed. Total: {len(self.h1_candles[inst])}")
+        if current_h1_bucket > self.current_h1_start[inst]:
+            # Close current candle straight into the column store
+            count = self._append_candle(self.h1_candles[inst], self.current_h1_start[inst] * H1_SECONDS, h1)
+            self._maybe_add_swing(inst, 'h1')
+            inst_state['h1_candles_count'] = count
+            self._add_log(f"🕯️ [{inst}] New 1H Candle Closed. Total: {count}")
             
             # Start new candle
-            self.current_h1_candle[inst] = self._update_candle(None, price)
-            self.current_h1_candle[inst]['start_time'] = current_h1_start_time
+            h1 = self.current_h1_candle[inst] = self._update_candle(None, price)
+            self.current_h1_start[inst] = current_h1_bucket
             
             # Run analysis if not in trade
-            if not self.state['instruments'][inst]['active_trade']:
+            if not inst_state['active_trade']:
                 self._run_smc_analysis(inst)
         
         # 4H Candles
-        if self.current_h4_candle[inst] is None:
-            self.current_h4_candle[inst] = self._update_candle(None, price)
-            self.current_h4_candle[inst]['start_time'] = current_h4_start_time
+        if h4 is None:
+            h4 = self.current_h4_candle[inst] = self._update_candle(None, price)
+            self.current_h4_start[inst] = current_h4_bucket
         
-        if current_h4_start_time > self.current_h4_candle[inst]['start_time']:
-            # Close current candle
-            c = self.current_h4_candle[inst]
-            final_candle = {
-                "time": int(c['start_time'].timestamp()),
-                "open": c['open'],
-                "high": c['high'],
-                "low": c['low'],
-                "close": c['close'],
-                "volume": 0
-            }
-            self.h4_candles[inst].append(final_candle)
-            self.state['instruments'][inst]['h4_candles_count'] = len(self.h4_candles[inst])
-            self._add_log(f"🕯️ [{inst}] New 4H Candle Closed. Total: {len(self.h4_candles[inst])}")
+        if current_h4_bucket > self.current_h4_start[inst]:
+            # Close current candle straight into the column store
+            count = self._append_candle(self.h4_candles[inst], self.current_h4_start[inst] * H4_SECONDS, h4)
+            self._maybe_add_swing(inst, 'h4')
+            inst_state['h4_candles_count'] = count
+            self._add_log(f"🕯️ [{inst}] New 4H Candle Closed. Total: {count}")
             
             # Start new candle
-            self.current_h4_candle[inst] = self._update_candle(None, price)
-            self.current_h4_candle[inst]['start_time'] = current_h4_start_time
+            h4 = self.current_h4_candle[inst] = self._update_candle(None, price)
+            self.current_h4_start[inst] = current_h4_bucket
         
         # Update current candles with every tick
-        self.current_h1_candle[inst] = self._update_candle(self.current_h1_candle[inst], price)
-        self.current_h4_candle[inst] = self._update_candle(self.current_h4_candle[inst], price)
+        _ohlc_update(h1, price)
+        _ohlc_update(h4, price)
 
     def _run_smc_analysis(self, inst: str):
         """Run SMC analysis for instrument"""
         bot = self.smc_bots[inst]
-        result = bot.analyze(self.h4_candles[inst], self.h1_candles[inst])
+        result = bot.analyze_incremental(self.candle_view(inst, 'h4'), self.candle_view(inst, 'h1'),
+                                         self.swing_view(inst, 'h4'), self.swing_view(inst, 'h1'))
         
+        inst_state = self.state['instruments'][inst]
+
         # Update analysis status
-        self.state['instruments'][inst]['analysis_status'] = result.get('details', 'Analysis complete')
+        inst_state['analysis_status'] = result.get('details', 'Analysis complete')
         
         # Handle trade signal
         if result['action'] == 'taketrade':
             result['live_pnl_pips'] = 0.0  # Initialize P/L
-            self.state['instruments'][inst]['active_trade'] = result
+            # Per-trade constants for the tick-level P/L and SL/TP checks
+            result['pips_mul'] = 100.0 if 'JPY' in inst else 10000.0
+            result['sign'] = 1.0 if result['order_type'] == 'BUY' else -1.0
+            inst_state['active_trade'] = result
             self._add_log(f"🚨 [{inst}] TAKE TRADE SIGNAL: {result['order_type']} @ {result['entry']:.5f}")
 
+    def _iter_stream_batches(self, response):
+        """Yield the raw newline-delimited messages of each large stream read as one batch, without decoding to str"""
+        pending = b''
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            *lines, pending = (pending + chunk).split(b'\n')
+            if lines:
+                yield lines
+        if pending:
+            yield [pending]
+
     def stop(self):
         """Stop the trading bot"""
         self.running = False
@@ -236,33 +541,22 @@ class LiveOandaTrader:
         while self.running:
             try:
                 self.state['connection_status'] = 'Connecting...'
-                response = requests.get(
-                    self.url,
-                    headers=self.headers,
-                    params=self.params,
-                    stream=True,
-                    timeout=30
-                )
-                
-                if response.status_code != 200:
-                    self.state['connection_status'] = f'Error {response.status_code}'
-                    self._add_log(f"Connection Error: {response.text}")
-                    time.sleep(15)
-                    continue
+                # Closing the response hands the connection back to the session pool
+                with self.session.get(self.url, params=self.params, stream=True, timeout=30) as response:
+                    if response.status_code != 200:
+                        self.state['connection_status'] = f'Error {response.status_code}'
+                        self._add_log(f"Connection Error: {response.text}")
+                        time.sleep(15)
+                        continue
 
-                self.state['connection_status'] = 'Connected'
-                self._add_log("✅ Connection successful")
+                    self.state['connection_status'] = 'Connected'
+                    self._add_log("✅ Connection successful")
                 
-                for line in response.iter_lines():
-                    if not self.running:
-                        break
-                        
-                    if line:
-                        try:
-                            data = json.loads(line.decode('utf-8'))
-                            self._handle_tick(data)
-                        except json.JSONDecodeError:
-                            continue
+                    # Everything received in one read is handled as a burst
+                    for lines in self._iter_stream_batches(response):
+                        if not self.running:
+                            break
+                        self._handle_lines(lines)
 
             except requests.exceptions.RequestException as e:
                 self.state['connection_status'] = 'Connection Lost'
@@ -275,3 +569,5 @@ class LiveOandaTrader:
                     time.sleep(10)
         
         self._add_log("🔌 Trading bot stream ended")
+        if self.socketio:
+            self._emit_q.put(None)